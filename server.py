@@ -14,20 +14,46 @@ in the same repo unless there's a clear migration plan.
 """
 
 import argparse
+import base64
+import collections
+import concurrent.futures
+import functools
+import gzip
+import heapq
+import http.client
 import http.server
 import json
 import os
+import selectors
 import socket
+import stat
 import threading
 import time
 import urllib.error
+import urllib.parse
 import urllib.request
+from types import MappingProxyType
+
+try:
+    import orjson  # optional; faster JSON encode/decode on the polling path when installed
+except ImportError:
+    orjson = None
 
 
 DIR = os.path.dirname(os.path.abspath(__file__))
 CONFIG_FILE = os.path.join(DIR, "config.json")
 
 
+if orjson is not None:
+    _json_dumps = orjson.dumps
+    _json_loads = orjson.loads
+else:
+    def _json_dumps(obj):
+        return json.dumps(obj).encode("utf-8")
+
+    _json_loads = json.loads
+
+
 def _debug_enabled():
     return os.environ.get("LOBSTER_ROOM_DEBUG", "").strip().lower() in ("1", "true", "yes", "on")
 
@@ -36,11 +62,41 @@ def _debug_enabled():
 _cache_lock = threading.Lock()
 _cache_last_ok = None  # last successful payload
 _cache_last_ok_ms = 0
+_cache_last_ok_gateways = None  # gateway config the payload was built from
+
+# Single-flight guard for the gateway fan-out (see build_lobster_room_state).
+_build_lock = threading.Lock()
+_last_build = None  # payload returned by the most recent aggregation
+_build_generation = 0  # bumped each time an aggregation completes
 
 # Transient state cache: shows short-lived tool/reply even if updatedAt doesn't move.
 _transient_lock = threading.Lock()
 _transient = {}  # gatewayId -> {state, expiresAtMs, observedAtMs, sessionKey}
 
+# Keep-alive connections to gateways, reused across polls so each tools/invoke call
+# doesn't pay a fresh TCP (+TLS) handshake.
+_http_pool_lock = threading.Lock()
+_http_pool = {}  # (scheme, netloc) -> [idle http.client connections]
+_HTTP_POOL_MAX_IDLE = 16
+
+# Snapshot kept fresh by the background poller (see _poll_loop); handlers serve it as-is.
+_latest_state = None
+_latest_state_monotonic = 0.0
+
+# Last sessions_list response per gateway and its parsed summary (see _summarize_sessions_list).
+_sessions_list_cache_lock = threading.Lock()
+_sessions_list_cache = {}  # gatewayId -> (raw response bytes, _SessionsListSummary)
+
+# Latest-message shape per session, reused while the session's updatedAt is unchanged.
+_history_cache_lock = threading.Lock()
+_history_cache = collections.OrderedDict()  # (gatewayId, sessionKey) -> (updatedAt, fetchedAtMs, shape)
+_HISTORY_CACHE_MAX = 512
+
+# Long-lived workers for the aggregation fan-out, so a poll doesn't spawn and tear down
+# threads. Gateway workers wait on invoke workers, so the two pools must stay separate.
+_gateway_pool = concurrent.futures.ThreadPoolExecutor(max_workers=32, thread_name_prefix="lobster-room-gateway")
+_invoke_pool = concurrent.futures.ThreadPoolExecutor(max_workers=16, thread_name_prefix="lobster-room-invoke")
+
 
 def load_config():
     # This portal is designed for env-first configuration.
@@ -56,7 +112,7 @@ def load_gateway_aggregator_config():
 
     Env formats:
       - Array: [{"id","label","baseUrl","tokenEnv"}, ...]
-      - Object: {"gateways":[...], "pollSeconds":5, "activeWindowMs":10000}
+      - Object: {"gateways":[...], "pollSeconds":5, "activeWindowMs":10000, "pollBudgetMs":6000}
     """
     cfg = load_config()
 
@@ -72,7 +128,7 @@ def load_gateway_aggregator_config():
     extra = {}
     if isinstance(env_obj, dict):
         gateways = env_obj.get("gateways")
-        for k in ("pollSeconds", "activeWindowMs"):
+        for k in ("pollSeconds", "activeWindowMs", "pollBudgetMs"):
             if k in env_obj:
                 extra[k] = env_obj.get(k)
     elif isinstance(env_obj, list):
@@ -104,16 +160,187 @@ def load_gateway_aggregator_config():
     out = {"gateways": norm, "pollSeconds": poll_seconds}
     if "activeWindowMs" in extra:
         out["activeWindowMs"] = extra["activeWindowMs"]
+    if "pollBudgetMs" in extra:
+        out["pollBudgetMs"] = extra["pollBudgetMs"]
     return out
 
 
 def _gateway_headers_from_env(token_env):
+    """Auth headers for a gateway's tokenEnv (empty if unset). Shared and read-only."""
     if not token_env:
+        return _auth_headers("")
+    return _auth_headers(os.environ.get(token_env, "").strip())
+
+
+@functools.lru_cache(maxsize=64)
+def _auth_headers(token):
+    # Keyed on the token value rather than the env var name, so a rotated token still takes effect.
+    return MappingProxyType({"Authorization": f"Bearer {token}"} if token else {})
+
+
+def _post_headers(gateway_headers):
+    """Full tools/invoke request headers: the gateway's auth headers plus the JSON content type."""
+    return {**gateway_headers, "Content-Type": "application/json"}
+
+
+@functools.lru_cache(maxsize=64)
+def _proxy_for(scheme, host):
+    """Return the urlsplit() proxy URL to use for scheme://host, or None to connect directly.
+
+    Same sources urlopen used: the *_proxy env vars (plus system settings where urllib
+    reads them) and no_proxy. getproxies() and proxy_bypass() scan the whole environment
+    on every call, so the answer is resolved once per (scheme, host) and kept for the
+    life of the process; proxy env changes take effect on restart.
+    """
+    proxy = urllib.request.getproxies().get(scheme)
+    if not proxy or urllib.request.proxy_bypass(host):
+        return None
+    return urllib.parse.urlsplit(proxy if "://" in proxy else f"http://{proxy}")
+
+
+def _proxy_auth_headers(proxy):
+    if not proxy.username:
         return {}
-    token = os.environ.get(token_env, "").strip()
-    if not token:
-        return {}
-    return {"Authorization": f"Bearer {token}"}
+    creds = f"{urllib.parse.unquote(proxy.username)}:{urllib.parse.unquote(proxy.password or '')}"
+    return {"Proxy-Authorization": "Basic " + base64.b64encode(creds.encode()).decode("ascii")}
+
+
+def _http_pool_acquire(scheme, netloc, proxy, timeout):
+    with _http_pool_lock:
+        idle = _http_pool.get((scheme, netloc, proxy))
+        conn = idle.pop() if idle else None
+    if conn is not None:
+        conn.timeout = timeout
+        if conn.sock is not None:
+            conn.sock.settimeout(timeout)
+        return conn, True
+    cls = http.client.HTTPSConnection if scheme == "https" else http.client.HTTPConnection
+    if proxy is None:
+        return cls(netloc, timeout=timeout), False
+    proxy_netloc = proxy.netloc.rpartition("@")[2]
+    if scheme == "https":
+        # CONNECT tunnel through the proxy; TLS runs end-to-end with the gateway.
+        conn = cls(proxy_netloc, timeout=timeout)
+        conn.set_tunnel(netloc, headers=_proxy_auth_headers(proxy))
+        return conn, False
+    # Plain HTTP goes to the proxy with an absolute request URL (see _http_request()).
+    return http.client.HTTPConnection(proxy_netloc, timeout=timeout), False
+
+
+def _http_pool_release(scheme, netloc, proxy, conn):
+    with _http_pool_lock:
+        idle = _http_pool.setdefault((scheme, netloc, proxy), [])
+        if len(idle) < _HTTP_POOL_MAX_IDLE:
+            idle.append(conn)
+            return
+    conn.close()
+
+
+# tools/invoke request bodies. sessions_list never changes and the per-session ones only
+# differ by the JSON-escaped sessionKey, so skip a full encoder pass per call.
+_SESSIONS_LIST_BODY = _json_dumps({"tool": "sessions_list", "action": "json", "args": {}})
+
+
+def _session_status_body(session_key):
+    return b'{"tool":"session_status","args":{"sessionKey":%s}}' % _json_dumps(session_key)
+
+
+def _sessions_history_body(session_key, limit=8):
+    return b'{"tool":"sessions_history","args":{"sessionKey":%s,"limit":%d}}' % (_json_dumps(session_key), limit)
+
+
+# Same limit as urllib's HTTPRedirectHandler.
+_MAX_REDIRECTS = 10
+
+
+def _post_tools_invoke_raw(url, body, headers, timeout):
+    """POST an encoded JSON body over a pooled keep-alive connection and return the raw response body.
+
+    headers are the complete request headers (see _post_headers()), sent as-is.
+    Proxies and redirects are handled the way urlopen handled them: *_proxy/no_proxy are
+    honoured, and a 301/302/303 is followed as a GET without the body.
+    Raises urllib.error.HTTPError for non-2xx responses so callers can keep reporting
+    gateway HTTP failures the same way as before.
+    """
+    method = "POST"
+    for _ in range(_MAX_REDIRECTS + 1):
+        resp, raw = _http_request(method, url, body, headers, timeout)
+        location = resp.headers.get("Location")
+        if resp.status not in (301, 302, 303) or not location:
+            break
+        url = urllib.parse.urljoin(url, location)
+        if urllib.parse.urlsplit(url).scheme not in ("http", "https"):
+            break
+        method, body = "GET", None
+        headers = {k: v for k, v in headers.items() if k.lower() not in ("content-type", "content-length")}
+
+    if not 200 <= resp.status < 300:
+        raise urllib.error.HTTPError(url, resp.status, resp.reason, resp.headers, None)
+    return raw
+
+
+def _http_request(method, url, body, headers, timeout):
+    """Send one request over a pooled keep-alive connection; return (response, body bytes)."""
+    parts = urllib.parse.urlsplit(url)
+    proxy = _proxy_for(parts.scheme, parts.hostname or "")
+    if proxy is not None and parts.scheme == "http":
+        target = urllib.parse.urlunsplit(parts._replace(fragment=""))
+        headers = {**headers, **_proxy_auth_headers(proxy)}
+    else:
+        target = parts.path or "/"
+        if parts.query:
+            target = f"{target}?{parts.query}"
+
+    while True:
+        conn, reused = _http_pool_acquire(parts.scheme, parts.netloc, proxy, timeout)
+        try:
+            conn.request(method, target, body=body, headers=headers)
+            resp = conn.getresponse()
+            raw = resp.read()
+        except (http.client.RemoteDisconnected, ConnectionResetError, BrokenPipeError):
+            conn.close()
+            # An idle keep-alive socket may have been closed by the gateway; retry once fresh.
+            if reused:
+                continue
+            raise
+        except Exception:
+            conn.close()
+            raise
+        if resp.will_close:
+            conn.close()
+        else:
+            _http_pool_release(parts.scheme, parts.netloc, proxy, conn)
+        return resp, raw
+
+
+def _parse_tools_invoke(raw):
+    try:
+        return _json_loads(raw)
+    except ValueError:
+        # Only pay for a decode when the body has stray invalid UTF-8 (the old errors="ignore" behaviour).
+        return _json_loads(raw.decode("utf-8", errors="ignore"))
+
+
+def _details(data):
+    """Return result.details of a tools/invoke response, or {} when it's missing or malformed."""
+    if isinstance(result := data.get("result"), dict) and isinstance(details := result.get("details"), dict):
+        return details
+    return {}
+
+
+def _post_tools_invoke(url, body, headers, timeout):
+    return _parse_tools_invoke(_post_tools_invoke_raw(url, body, headers, timeout))
+
+
+def _call_timeout(timeout, deadline):
+    """Cap a per-call timeout by what's left of the gateway's poll budget (floor 0.5s)."""
+    return min(timeout, max(0.5, deadline - time.monotonic()))
+
+
+def _timed_tools_invoke(url, body, headers, timeout, deadline):
+    t0 = int(time.time() * 1000)
+    data = _post_tools_invoke(url, body, headers, timeout=_call_timeout(timeout, deadline))
+    return data, int(time.time() * 1000) - t0
 
 
 def _active_window_ms_from_env_or_cfg(cfg):
@@ -169,6 +396,66 @@ def _cache_ttl_ms_from_env_or_cfg(cfg):
         return 1500
 
 
+def _poll_budget_ms_from_env_or_cfg(cfg):
+    env = os.environ.get("LOBSTER_ROOM_POLL_BUDGET_MS", "").strip()
+    if env:
+        try:
+            return max(0, int(env))
+        except ValueError:
+            pass
+    # Default: 6000ms keeps one slow gateway from holding /api/lobster-room for long.
+    try:
+        return max(0, int(cfg.get("pollBudgetMs", 6000)))
+    except (TypeError, ValueError):
+        return 6000
+
+
+def _server_workers_from_env_or_cfg(server_cfg):
+    env = os.environ.get("LOBSTER_ROOM_SERVER_WORKERS", "").strip()
+    if env:
+        try:
+            return max(1, int(env))
+        except ValueError:
+            pass
+    try:
+        return max(1, int(server_cfg.get("workers", 16)))
+    except (TypeError, ValueError):
+        return 16
+
+
+# Env vars that feed the aggregator settings; the parsed settings are reused until one changes.
+_SETTINGS_ENV_KEYS = (
+    "LOBSTER_ROOM_GATEWAYS_JSON",
+    "LOBSTER_ROOM_ACTIVE_WINDOW_MS",
+    "LOBSTER_ROOM_POLL_SECONDS",
+    "LOBSTER_ROOM_TOOL_TTL_MS",
+    "LOBSTER_ROOM_CACHE_TTL_MS",
+    "LOBSTER_ROOM_POLL_BUDGET_MS",
+)
+
+
+@functools.lru_cache(maxsize=1)
+def _aggregator_settings_for(env_values):
+    agg_cfg = load_gateway_aggregator_config()
+    return (
+        agg_cfg,
+        _active_window_ms_from_env_or_cfg(agg_cfg),
+        _tool_ttl_ms_from_env_or_cfg(agg_cfg),
+        _cache_ttl_ms_from_env_or_cfg(agg_cfg),
+        _poll_seconds_from_env_or_cfg(agg_cfg),
+        _poll_budget_ms_from_env_or_cfg(agg_cfg),
+    )
+
+
+def _aggregator_settings():
+    """Return (agg_cfg, active_window_ms, tool_ttl_ms, cache_ttl_ms, poll_seconds, poll_budget_ms).
+
+    Parsing LOBSTER_ROOM_GATEWAYS_JSON and the knobs is cached per distinct set of env
+    values, so polls don't redo it on every request. Treat agg_cfg as read-only.
+    """
+    return _aggregator_settings_for(tuple(os.environ.get(k) for k in _SETTINGS_ENV_KEYS))
+
+
 def _agent_id_from_session_key(key):
     if not isinstance(key, str):
         return None
@@ -180,228 +467,275 @@ def _agent_id_from_session_key(key):
     return parts[1] or None
 
 
-def _pick_resident_session_for_agent(sessions, agent_id):
-    """Pick a stable "resident" sessionKey to represent the agent.
+_SessionDigest = collections.namedtuple("_SessionDigest", "max_updated_at ranked resident_session")
 
-    Heuristics (in order):
-    - Prefer agent:main:main for main agent
-    - Avoid cron sessions
-    - Otherwise pick the most recently updated session
-    """
-    if not sessions:
-        return None
 
-    if agent_id == "main":
-        for s in sessions:
-            k = s.get("key")
-            if isinstance(k, str) and k == "agent:main:main":
-                return k
+def _digest_sessions(agent_sessions, agent_id):
+    """Summarize an agent's sessions in a single pass.
 
-    # Prefer non-cron sessions.
-    best = None
-    best_ts = None
-    for s in sessions:
+    Only non-cron sessions are considered, unless every session is cron.
+    - max_updated_at: newest updatedAt
+    - ranked: up to 10 sessions with a key + updatedAt, newest first
+    - resident_session: a stable "resident" session to represent the agent
+      (agent:main:main for the main agent, otherwise the most recently updated)
+    """
+    # Accumulators per bucket: [count, max_ts, rankable, agent:main:main session]
+    non_cron = [0, None, [], None]
+    cron = [0, None, [], None]
+    for s in agent_sessions:
+        acc = cron if (s.get("kind") or "").lower() == "cron" else non_cron
+        acc[0] += 1
         k = s.get("key")
-        kind = (s.get("kind") or "").lower()
+        if k == "agent:main:main" and acc[3] is None:
+            acc[3] = s
         ts = s.get("updatedAt")
-        if not isinstance(k, str) or not isinstance(ts, (int, float)):
-            continue
-        if kind == "cron":
-            continue
-        ts = int(ts)
-        if best is None or ts > best_ts:
-            best = k
-            best_ts = ts
+        if isinstance(ts, (int, float)):
+            ts = int(ts)
+            if acc[1] is None or ts > acc[1]:
+                acc[1] = ts
+            if isinstance(k, str):
+                acc[2].append(s)
 
-    if best:
-        return best
+    _, max_updated_at, rankable, main_main = non_cron if non_cron[0] else cron
+    # Only the newest 10 are ever looked at (status candidates + debug), so take a top-k
+    # instead of sorting every session.
+    ranked = heapq.nlargest(10, rankable, key=lambda s: int(s.get("updatedAt")))
+    if agent_id == "main" and main_main is not None:
+        resident_session = main_main
+    else:
+        resident_session = ranked[0] if ranked else None
+    return _SessionDigest(max_updated_at, ranked, resident_session)
 
-    # Fallback: latest by updatedAt.
-    sessions2 = [s for s in sessions if isinstance(s.get("key"), str) and isinstance(s.get("updatedAt"), (int, float))]
-    if not sessions2:
-        return None
-    sessions2.sort(key=lambda s: int(s.get("updatedAt")), reverse=True)
-    return sessions2[0].get("key")
-def build_lobster_room_state():
-    agg_cfg = load_gateway_aggregator_config()
-    gateways = agg_cfg.get("gateways", [])
-    active_window_ms = _active_window_ms_from_env_or_cfg(agg_cfg)
-    tool_ttl_ms = _tool_ttl_ms_from_env_or_cfg(agg_cfg)
-    cache_ttl_ms = _cache_ttl_ms_from_env_or_cfg(agg_cfg)
-    poll_seconds = _poll_seconds_from_env_or_cfg(agg_cfg)
 
-    # Cache hit: return last successful payload to avoid UI flapping.
-    now_ms = int(time.time() * 1000)
-    with _cache_lock:
-        if _cache_last_ok and (now_ms - _cache_last_ok_ms) <= cache_ttl_ms:
-            cached = dict(_cache_last_ok)
-            cached["cached"] = True
-            cached["cacheAgeMs"] = now_ms - _cache_last_ok_ms
-            return cached
+_SessionsListSummary = collections.namedtuple("_SessionsListSummary", "session_count max_updated_at agents")
 
-    out = {
-        "ok": True,
-        "generatedAt": int(time.time()),
-        "pollSeconds": poll_seconds,
-        "gateways": [],
-        "agents": [],
-        "errors": [],
-    }
 
-    if not gateways:
-        out["ok"] = False
-        out["errors"].append("No gateways configured. Set LOBSTER_ROOM_GATEWAYS_JSON")
-        return out
+def _summarize_sessions_list(gateway_id, raw):
+    """Parse a sessions_list response into gateway meta + per-agent digests.
 
-    # now_ms already computed above (used for cache + status heuristics)
+    While agents are idle the gateway keeps returning byte-identical JSON, so the previous
+    summary for the gateway is reused instead of re-parsing and re-scanning every session.
+    The returned summary is shared; treat it as read-only.
+    """
+    with _sessions_list_cache_lock:
+        prev = _sessions_list_cache.get(gateway_id)
+    if prev is not None and prev[0] == raw:
+        return prev[1]
+
+    data = _parse_tools_invoke(raw)
+    if not data.get("ok"):
+        raise Exception(str(data.get("error") or "tools/invoke failed"))
+    details = _details(data)
+    sessions = details.get("sessions") or []
+
+    # For gateway meta, track max updatedAt across all sessions.
+    max_updated_at_all = None
+    for s in sessions:
+        ts = s.get("updatedAt")
+        if isinstance(ts, (int, float)):
+            ts = int(ts)
+            if max_updated_at_all is None or ts > max_updated_at_all:
+                max_updated_at_all = ts
 
-    for gw in gateways:
-        base = gw["baseUrl"]
-        url = f"{base}/tools/invoke"
-        headers = _gateway_headers_from_env(gw.get("tokenEnv", ""))
-        if gw.get("tokenEnv") and not headers:
-            out["ok"] = False
-            out["errors"].append(f"{gw['id']} missing env var: {gw['tokenEnv']} (for {base})")
+    # Group sessions by agentId (derived from sessionKey).
+    sessions_by_agent = {}
+    for s in sessions:
+        aid = _agent_id_from_session_key(s.get("key"))
+        if not aid:
             continue
+        sessions_by_agent.setdefault(aid, []).append(s)
 
-        try:
-            debug = {"gatewayId": gw.get("id"), "timingsMs": {}, "sessionCandidates": [], "decision": {}}
-            t0 = int(time.time() * 1000)
-
-            # 1) sessions_list
-            payload = {"tool": "sessions_list", "action": "json", "args": {}}
-            req = urllib.request.Request(
-                url,
-                data=json.dumps(payload).encode("utf-8"),
-                headers={**headers, "Content-Type": "application/json"},
-                method="POST",
-            )
-            t_list_0 = int(time.time() * 1000)
-            with urllib.request.urlopen(req, timeout=4) as resp:
-                raw = resp.read().decode("utf-8", errors="ignore")
-            debug["timingsMs"]["sessions_list"] = int(time.time() * 1000) - t_list_0
-            data = json.loads(raw)
-            if not data.get("ok"):
-                raise Exception(str(data.get("error") or "tools/invoke failed"))
-            details = (data.get("result") or {}).get("details") or {}
-            sessions = details.get("sessions") or []
-
-            # For gateway meta, track max updatedAt across all sessions.
-            max_updated_at_all = None
-            for s in sessions:
-                ts = s.get("updatedAt")
-                if isinstance(ts, (int, float)):
-                    ts = int(ts)
-                    if max_updated_at_all is None or ts > max_updated_at_all:
-                        max_updated_at_all = ts
-
-            out["gateways"].append(
-                {
-                    "id": gw["id"],
-                    "label": gw["label"],
-                    "baseUrl": gw["baseUrl"],
-                    "status": "ok",
-                    "sessionCount": details.get("count"),
-                    "maxUpdatedAt": max_updated_at_all,
-                }
-            )
-
-            # Group sessions by agentId (derived from sessionKey).
-            sessions_by_agent = {}
-            for s in sessions:
-                aid = _agent_id_from_session_key(s.get("key"))
-                if not aid:
-                    continue
-                sessions_by_agent.setdefault(aid, []).append(s)
-
-            if not sessions_by_agent:
-                sessions_by_agent = {"resident": sessions}
-
-            gwid = gw.get("id")
+    if not sessions_by_agent:
+        sessions_by_agent = {"resident": sessions}
 
-            for agent_id, agent_sessions in sessions_by_agent.items():
-                # Prefer non-cron sessions if available.
-                non_cron = [s for s in agent_sessions if (s.get("kind") or "").lower() != "cron"]
-                base_sessions = non_cron or agent_sessions
+    agents = [
+        (agent_id, len(agent_sessions), _digest_sessions(agent_sessions, agent_id))
+        for agent_id, agent_sessions in sessions_by_agent.items()
+    ]
+    summary = _SessionsListSummary(details.get("count"), max_updated_at_all, agents)
+    with _sessions_list_cache_lock:
+        _sessions_list_cache[gateway_id] = (raw, summary)
+    return summary
 
-                # For "activity window" we use max updatedAt across the agent's sessions.
-                max_updated_at = None
-                for s in base_sessions:
-                    ts = s.get("updatedAt")
-                    if isinstance(ts, (int, float)):
-                        ts = int(ts)
-                        if max_updated_at is None or ts > max_updated_at:
-                            max_updated_at = ts
 
-                # For richer status, don't rely on a single session; evaluate a few.
-                sessions_sorted = [s for s in base_sessions if isinstance(s.get("key"), str) and isinstance(s.get("updatedAt"), (int, float))]
-                sessions_sorted.sort(key=lambda s: int(s.get("updatedAt")), reverse=True)
-                top_sessions = sessions_sorted[:2]
+def _last_message_shape(data):
+    """Return (firstPartType, partTypes, role) of the newest message in a sessions_history result.
 
-                recent_activity = bool(max_updated_at and (now_ms - max_updated_at) <= active_window_ms)
+    Returns () when the call failed or there is no message to look at.
+    """
+    if not data.get("ok"):
+        return ()
+    msgs = _details(data).get("messages") or []
+    if not msgs:
+        return ()
+    last = msgs[0]
+    c = last.get("content")
+    lpt = None
+    types = []
+    if isinstance(c, list):
+        for part in c:
+            if isinstance(part, dict) and part.get("type"):
+                types.append(part.get("type"))
+                if lpt is None:
+                    lpt = part.get("type")
+    return (lpt, types, last.get("role"))
+
+
+def _history_cache_get(gateway_id, session_key, updated_at, now_ms, max_age_ms):
+    """Return the cached shape if updatedAt is unchanged and it was fetched within max_age_ms."""
+    if not isinstance(updated_at, (int, float)):
+        return None
+    with _history_cache_lock:
+        hit = _history_cache.get((gateway_id, session_key))
+        if hit is None or hit[0] != updated_at or (now_ms - hit[1]) > max_age_ms:
+            return None
+        _history_cache.move_to_end((gateway_id, session_key))
+        return hit[2]
+
+
+def _history_cache_put(gateway_id, session_key, updated_at, now_ms, shape):
+    # () means the call failed or had nothing to look at: always ask again next poll.
+    if not shape or not isinstance(updated_at, (int, float)):
+        return
+    with _history_cache_lock:
+        _history_cache[(gateway_id, session_key)] = (updated_at, now_ms, shape)
+        _history_cache.move_to_end((gateway_id, session_key))
+        while len(_history_cache) > _HISTORY_CACHE_MAX:
+            _history_cache.popitem(last=False)
+
+
+def _poll_gateway(gw, now_ms, active_window_ms, tool_ttl_ms, poll_budget_ms):
+    """Poll one gateway and return its {"gateways", "agents", "errors"} contributions."""
+    result = {"gateways": [], "agents": [], "errors": []}
+    gwid, glabel, base = gw["id"], gw["label"], gw["baseUrl"]
+    url = f"{base}/tools/invoke"
+    token_env = gw.get("tokenEnv", "")
+    gateway_headers = _gateway_headers_from_env(token_env)
+    if token_env and not gateway_headers:
+        result["errors"].append(f"{gwid} missing env var: {token_env} (for {base})")
+        return result
+    # Built once and shared by every call this poll makes to the gateway.
+    headers = _post_headers(gateway_headers)
 
-                # Per-agent debug
-                dbg = {
-                    "gatewayId": gw.get("id"),
-                    "agentId": agent_id,
-                    "timingsMs": {},
-                    "sessionCandidates": [],
-                    "decision": {},
-                }
-                for s in sessions_sorted[:10]:
-                    dbg["sessionCandidates"].append({
-                        "key": s.get("key"),
-                        "kind": s.get("kind"),
-                        "updatedAt": int(s.get("updatedAt")) if isinstance(s.get("updatedAt"), (int, float)) else None,
-                    })
-                dbg["decision"]["recentActivity"] = recent_activity
-                dbg["decision"]["maxUpdatedAt"] = max_updated_at
-                dbg["decision"]["nowMs"] = now_ms
-                dbg["decision"]["activeWindowMs"] = active_window_ms
-                dbg["decision"]["toolTtlMs"] = tool_ttl_ms
-
-                # Ensure we always include the resident session if present.
-                resident_key = _pick_resident_session_for_agent(base_sessions, agent_id)
-                if resident_key and all(s.get("key") != resident_key for s in top_sessions):
-                    top_sessions = ([{"key": resident_key}] + top_sessions)[:6]
-
-                session_key_for_status = resident_key or (top_sessions[0].get("key") if top_sessions else None)
-
-                # 2) session_status (aggregate over top sessions)
-                # Always attempt at least one session_status call so we can detect active runs
-                # even if sessions_list.updatedAt is stale.
-                queue_depth = None
-                status_text = None
-                status_session_key = None
-
-                for i, ss in enumerate(top_sessions):
-                    # If we already consider it "recent", only check the first candidate (usually resident)
-                    # to keep load low.
-                    if recent_activity and i > 0:
-                        break
+    try:
+        debug = {"gatewayId": gwid, "timingsMs": {}, "sessionCandidates": [], "decision": {}}
+        t0 = int(time.time() * 1000)
+        # Every call below is capped by what's left of this budget, and no agent starts its
+        # calls once it's spent, so a slow gateway can't stretch the poll to the sum of all
+        # its per-call timeouts. Running out is reported as this gateway's error.
+        deadline = time.monotonic() + poll_budget_ms / 1000
+        over_budget = False
+
+        # 1) sessions_list
+        t_list_0 = int(time.time() * 1000)
+        raw_list = _post_tools_invoke_raw(url, _SESSIONS_LIST_BODY, headers, timeout=_call_timeout(4, deadline))
+        debug["timingsMs"]["sessions_list"] = int(time.time() * 1000) - t_list_0
+        summary = _summarize_sessions_list(gwid, raw_list)
+
+        result["gateways"].append(
+            {
+                "id": gwid,
+                "label": glabel,
+                "baseUrl": base,
+                "status": "ok",
+                "sessionCount": summary.session_count,
+                "maxUpdatedAt": summary.max_updated_at,
+            }
+        )
+
+        agent_label = gw.get("agentLabel")
+        for agent_id, agent_session_count, digest in summary.agents:
+            if over_budget or time.monotonic() >= deadline:
+                over_budget = True
+                break
+            max_updated_at = digest.max_updated_at
+            # For richer status, don't rely on a single session; evaluate a few.
+            sessions_sorted = digest.ranked
+            top_sessions = sessions_sorted[:2]
+
+            recent_activity = bool(max_updated_at and (now_ms - max_updated_at) <= active_window_ms)
+
+            # Per-agent debug
+            dbg = {
+                "gatewayId": gwid,
+                "agentId": agent_id,
+                "timingsMs": {},
+                "sessionCandidates": [],
+                "decision": {},
+            }
+            for s in sessions_sorted[:10]:
+                dbg["sessionCandidates"].append({
+                    "key": s.get("key"),
+                    "kind": s.get("kind"),
+                    "updatedAt": int(s.get("updatedAt")) if isinstance(s.get("updatedAt"), (int, float)) else None,
+                })
+            dbg["decision"]["recentActivity"] = recent_activity
+            dbg["decision"]["maxUpdatedAt"] = max_updated_at
+            dbg["decision"]["nowMs"] = now_ms
+            dbg["decision"]["activeWindowMs"] = active_window_ms
+            dbg["decision"]["toolTtlMs"] = tool_ttl_ms
+
+            # Ensure we always include the resident session if present.
+            resident = digest.resident_session
+            resident_key = resident.get("key") if resident else None
+            if resident_key and all(s.get("key") != resident_key for s in top_sessions):
+                top_sessions = ([resident] + top_sessions)[:6]
+
+            session_key_for_status = resident_key or (top_sessions[0].get("key") if top_sessions else None)
+
+            # 2) session_status (aggregate over top sessions)
+            # Always attempt at least one session_status call so we can detect active runs
+            # even if sessions_list.updatedAt is stale.
+            queue_depth = None
+            status_text = None
+            status_session_key = None
+
+            # The per-session status and history calls are independent; issue them all at once
+            # and walk the results in candidate order so the selection below matches a
+            # sequential scan.
+            status_keys = []
+            for i, ss in enumerate(top_sessions):
+                # If we already consider it "recent", only check the first candidate (usually resident)
+                # to keep load low.
+                if recent_activity and i > 0:
+                    break
+                k = ss.get("key")
+                if isinstance(k, str) and k:
+                    status_keys.append(k)
+            status_futures = [
+                (k, _invoke_pool.submit(_timed_tools_invoke, url, _session_status_body(k), headers, 2, deadline))
+                for k in status_keys
+            ]
+
+            history_pending = []
+            if not recent_activity:
+                # Once the agent is idle past both windows, briefly reuse a session's last result
+                # while its updatedAt hasn't moved. updatedAt can lag new messages (that's what
+                # the transient state below is for), so never for longer than toolTtlMs.
+                idle = max_updated_at is None or (now_ms - max_updated_at) > max(active_window_ms, tool_ttl_ms)
+                for ss in top_sessions:
                     k = ss.get("key")
                     if not isinstance(k, str) or not k:
                         continue
-                    payload2 = {"tool": "session_status", "args": {"sessionKey": k}}
-                    req2 = urllib.request.Request(
-                        url,
-                        data=json.dumps(payload2).encode("utf-8"),
-                        headers={**headers, "Content-Type": "application/json"},
-                        method="POST",
-                    )
-                    t_stat_0 = int(time.time() * 1000)
-                    with urllib.request.urlopen(req2, timeout=2) as resp:
-                        raw2 = resp.read().decode("utf-8", errors="ignore")
-                    dbg.setdefault("timingsMs", {}).setdefault("session_status", {})[k] = int(time.time() * 1000) - t_stat_0
-                    data2 = json.loads(raw2)
+                    ts = ss.get("updatedAt")
+                    shape = _history_cache_get(gwid, k, ts, now_ms, tool_ttl_ms) if idle else None
+                    fut = None
+                    if shape is None:
+                        fut = _invoke_pool.submit(_timed_tools_invoke, url, _sessions_history_body(k), headers, 2, deadline)
+                    history_pending.append((k, ts, fut, shape))
+
+            try:
+                for k, fut in status_futures:
+                    data2, elapsed_ms = fut.result()
+                    dbg.setdefault("timingsMs", {}).setdefault("session_status", {})[k] = elapsed_ms
                     if not data2.get("ok"):
                         continue
-                    det2 = (data2.get("result") or {}).get("details") or {}
+                    det2 = _details(data2)
                     qd = None
-                    if isinstance(det2.get("queueDepth"), (int, float)):
-                        qd = int(det2.get("queueDepth"))
-                    elif isinstance(det2.get("queue"), dict) and isinstance(det2.get("queue").get("depth"), (int, float)):
-                        qd = int(det2.get("queue").get("depth"))
+                    if isinstance(depth := det2.get("queueDepth"), (int, float)):
+                        qd = int(depth)
+                    elif isinstance(queue := det2.get("queue"), dict) and isinstance(depth := queue.get("depth"), (int, float)):
+                        qd = int(depth)
                     if isinstance(qd, int):
                         if queue_depth is None or qd > queue_depth:
                             queue_depth = qd
@@ -409,185 +743,237 @@ def build_lobster_room_state():
                             status_session_key = k
                         if qd > 0:
                             break
+                # Drop status calls that haven't started yet once the scan has its answer.
+                for _, fut in status_futures:
+                    fut.cancel()
 
                 # 3) sessions_history (latest message only, aggregate over top sessions)
                 history_types = []
                 last_msg_role = None
                 last_part_type = None
                 history_session_key = None
-                if not recent_activity:
-                    for ss in top_sessions:
-                        k = ss.get("key")
-                        if not isinstance(k, str) or not k:
-                            continue
-                        try:
-                            payload3 = {"tool": "sessions_history", "args": {"sessionKey": k, "limit": 8}}
-                            req3 = urllib.request.Request(
-                                url,
-                                data=json.dumps(payload3).encode("utf-8"),
-                                headers={**headers, "Content-Type": "application/json"},
-                                method="POST",
-                            )
-                            t_hist_0 = int(time.time() * 1000)
-                            with urllib.request.urlopen(req3, timeout=2) as resp:
-                                raw3 = resp.read().decode("utf-8", errors="ignore")
-                            dbg.setdefault("timingsMs", {}).setdefault("sessions_history", {})[k] = int(time.time() * 1000) - t_hist_0
-                            data3 = json.loads(raw3)
-                            if not data3.get("ok"):
-                                continue
-                            msgs = ((data3.get("result") or {}).get("details") or {}).get("messages") or []
-                            if not msgs:
-                                continue
-                            last = msgs[0]
-                            c = last.get("content")
-                            lpt = None
-                            types = []
-                            if isinstance(c, list):
-                                for part in c:
-                                    if isinstance(part, dict) and part.get("type"):
-                                        types.append(part.get("type"))
-                                        if lpt is None:
-                                            lpt = part.get("type")
-                            role = last.get("role")
-
-                            if lpt == "toolCall":
-                                history_session_key = k
-                                history_types = types
-                                last_part_type = lpt
-                                last_msg_role = role
-                                break
-                            if lpt == "text" and role == "assistant" and last_part_type is None:
-                                history_session_key = k
-                                history_types = types
-                                last_part_type = lpt
-                                last_msg_role = role
-                        except Exception:
+                for k, ts, fut, shape in history_pending:
+                    try:
+                        if fut is not None:
+                            data3, elapsed_ms = fut.result()
+                            dbg.setdefault("timingsMs", {}).setdefault("sessions_history", {})[k] = elapsed_ms
+                            shape = _last_message_shape(data3)
+                            _history_cache_put(gwid, k, ts, now_ms, shape)
+                        if not shape:
                             continue
+                        lpt, types, role = shape
 
-                # Status selection
-                is_active = False
-                if isinstance(queue_depth, int):
-                    is_active = queue_depth > 0
-                if not is_active:
-                    is_active = bool(max_updated_at and (now_ms - max_updated_at) <= active_window_ms)
-
-                state = "think" if is_active else "wait"
-                if not is_active:
-                    within_ttl = bool(max_updated_at and (now_ms - max_updated_at) <= tool_ttl_ms)
-                    if within_ttl and last_part_type == "toolCall":
-                        state = "tool"
-                    elif within_ttl and last_part_type == "text" and last_msg_role == "assistant":
-                        state = "reply"
-
-                # Record transient observation (tool/reply) keyed by gateway+agent.
-                fingerprint = None
-                transient_key = f"{gwid}:{agent_id}"
-                if gwid and last_part_type in ("toolCall", "text"):
-                    fingerprint = f"{history_session_key}|{last_msg_role}|{last_part_type}|{','.join(history_types[:2])}"
-                    transient_state = None
-                    if last_part_type == "toolCall":
-                        transient_state = "tool"
-                    elif last_part_type == "text" and last_msg_role == "assistant":
-                        transient_state = "reply"
-                    if transient_state:
-                        with _transient_lock:
-                            prev = _transient.get(transient_key)
-                            prev_fp = prev.get("fingerprint") if isinstance(prev, dict) else None
-                            if prev_fp != fingerprint:
-                                _transient[transient_key] = {
-                                    "state": transient_state,
-                                    "observedAtMs": now_ms,
-                                    "firstObservedAtMs": (prev.get("firstObservedAtMs") if isinstance(prev, dict) and prev.get("state") == transient_state else now_ms),
-                                    "expiresAtMs": now_ms + tool_ttl_ms,
-                                    "sessionKey": history_session_key,
-                                    "fingerprint": fingerprint,
-                                }
-
-                # Apply transient state if still valid.
-                transient_applied = False
-                if gwid:
+                        if lpt == "toolCall":
+                            history_session_key = k
+                            history_types = types
+                            last_part_type = lpt
+                            last_msg_role = role
+                            break
+                        if lpt == "text" and role == "assistant" and last_part_type is None:
+                            history_session_key = k
+                            history_types = types
+                            last_part_type = lpt
+                            last_msg_role = role
+                    except Exception:
+                        if time.monotonic() >= deadline:
+                            over_budget = True
+                        continue
+            finally:
+                # Whatever happened above (including a failed call aborting the gateway), don't
+                # leave this agent's queued calls to run against the gateway. Calls already in
+                # flight can't be stopped and just finish.
+                for _, fut in status_futures:
+                    fut.cancel()
+                for _, _, fut, _ in history_pending:
+                    if fut is not None:
+                        fut.cancel()
+
+            # Status selection
+            is_active = False
+            if isinstance(queue_depth, int):
+                is_active = queue_depth > 0
+            if not is_active:
+                is_active = bool(max_updated_at and (now_ms - max_updated_at) <= active_window_ms)
+
+            state = "think" if is_active else "wait"
+            if not is_active:
+                within_ttl = bool(max_updated_at and (now_ms - max_updated_at) <= tool_ttl_ms)
+                if within_ttl and last_part_type == "toolCall":
+                    state = "tool"
+                elif within_ttl and last_part_type == "text" and last_msg_role == "assistant":
+                    state = "reply"
+
+            # Record transient observation (tool/reply) keyed by gateway+agent.
+            fingerprint = None
+            transient_key = f"{gwid}:{agent_id}"
+            if gwid and last_part_type in ("toolCall", "text"):
+                fingerprint = f"{history_session_key}|{last_msg_role}|{last_part_type}|{','.join(history_types[:2])}"
+                transient_state = None
+                if last_part_type == "toolCall":
+                    transient_state = "tool"
+                elif last_part_type == "text" and last_msg_role == "assistant":
+                    transient_state = "reply"
+                if transient_state:
                     with _transient_lock:
-                        tr = _transient.get(transient_key)
-                    if tr and now_ms <= int(tr.get("expiresAtMs") or 0):
-                        if state == "wait":
-                            max_ms = int(os.environ.get("LOBSTER_ROOM_TRANSIENT_MAX_MS", "15000") or "15000")
-                            first_ms = int(tr.get("firstObservedAtMs") or tr.get("observedAtMs") or now_ms)
-                            if (now_ms - first_ms) <= max_ms:
-                                state = tr.get("state") or state
-                                transient_applied = True
-                            else:
-                                with _transient_lock:
-                                    _transient.pop(transient_key, None)
-
-                dbg["decision"]["queueDepth"] = queue_depth
-                dbg["decision"]["statusSessionKey"] = status_session_key
-                dbg["decision"]["historySessionKey"] = history_session_key
-                dbg["decision"]["historyLastType"] = last_part_type
-                dbg["decision"]["historyLastRole"] = last_msg_role
-                dbg["decision"]["transientState"] = (tr.get("state") if ('tr' in locals() and tr) else None)
-                dbg["decision"]["transientExpiresAtMs"] = (tr.get("expiresAtMs") if ('tr' in locals() and tr) else None)
-                dbg["decision"]["transientFingerprint"] = (tr.get("fingerprint") if ('tr' in locals() and tr) else None)
-                dbg["decision"]["transientFirstObservedAtMs"] = (tr.get("firstObservedAtMs") if ('tr' in locals() and tr) else None)
-                dbg["decision"]["transientApplied"] = transient_applied
-                dbg["decision"]["finalState"] = state
-                dbg["timingsMs"]["gatewayTotal"] = int(time.time() * 1000) - t0
-
-                agent_name = agent_id
-                if agent_id == "main" and gw.get("agentLabel"):
-                    agent_name = gw.get("agentLabel")
-
-                agent_payload = {
-                    "id": f"{agent_id}@{gw['id']}",
-                    "hostId": gw["id"],
-                    "hostLabel": gw["label"],
-                    "name": agent_name,
-                    "state": state,
-                    "meta": {
-                        "agentId": agent_id,
-                        "active": is_active,
-                        "activeWindowMs": active_window_ms,
-                        "toolTtlMs": tool_ttl_ms,
-                        "maxUpdatedAt": max_updated_at,
-                        "sessionKeyForStatus": session_key_for_status,
-                        "statusSessionKey": status_session_key,
-                        "historySessionKey": history_session_key,
-                        "queueDepth": queue_depth,
-                        "statusText": status_text,
-                        "historyTypes": history_types,
-                        "historyLastRole": last_msg_role,
-                        "historyLastType": last_part_type,
-                        "sessionCount": len(agent_sessions),
-                    },
-                }
-                if _debug_enabled():
-                    agent_payload["debug"] = dbg
-                out["agents"].append(agent_payload)
-
-        except urllib.error.HTTPError as e:
-            out["ok"] = False
-            msg = f"{gw['id']} HTTP {e.code} at {url}"
-            out["errors"].append(msg)
+                        prev = _transient.get(transient_key)
+                        prev_fp = prev.get("fingerprint") if isinstance(prev, dict) else None
+                        if prev_fp != fingerprint:
+                            _transient[transient_key] = {
+                                "state": transient_state,
+                                "observedAtMs": now_ms,
+                                "firstObservedAtMs": (prev.get("firstObservedAtMs") if isinstance(prev, dict) and prev.get("state") == transient_state else now_ms),
+                                "expiresAtMs": now_ms + tool_ttl_ms,
+                                "sessionKey": history_session_key,
+                                "fingerprint": fingerprint,
+                            }
+
+            # Apply transient state if still valid.
+            transient_applied = False
+            if gwid:
+                with _transient_lock:
+                    tr = _transient.get(transient_key)
+                if tr and now_ms <= int(tr.get("expiresAtMs") or 0):
+                    if state == "wait":
+                        max_ms = int(os.environ.get("LOBSTER_ROOM_TRANSIENT_MAX_MS", "15000") or "15000")
+                        first_ms = int(tr.get("firstObservedAtMs") or tr.get("observedAtMs") or now_ms)
+                        if (now_ms - first_ms) <= max_ms:
+                            state = tr.get("state") or state
+                            transient_applied = True
+                        else:
+                            with _transient_lock:
+                                _transient.pop(transient_key, None)
+
+            dbg["decision"]["queueDepth"] = queue_depth
+            dbg["decision"]["statusSessionKey"] = status_session_key
+            dbg["decision"]["historySessionKey"] = history_session_key
+            dbg["decision"]["historyLastType"] = last_part_type
+            dbg["decision"]["historyLastRole"] = last_msg_role
+            dbg["decision"]["transientState"] = (tr.get("state") if ('tr' in locals() and tr) else None)
+            dbg["decision"]["transientExpiresAtMs"] = (tr.get("expiresAtMs") if ('tr' in locals() and tr) else None)
+            dbg["decision"]["transientFingerprint"] = (tr.get("fingerprint") if ('tr' in locals() and tr) else None)
+            dbg["decision"]["transientFirstObservedAtMs"] = (tr.get("firstObservedAtMs") if ('tr' in locals() and tr) else None)
+            dbg["decision"]["transientApplied"] = transient_applied
+            dbg["decision"]["finalState"] = state
+            dbg["timingsMs"]["gatewayTotal"] = int(time.time() * 1000) - t0
+
+            agent_name = agent_id
+            if agent_id == "main" and agent_label:
+                agent_name = agent_label
+
+            agent_payload = {
+                "id": f"{agent_id}@{gwid}",
+                "hostId": gwid,
+                "hostLabel": glabel,
+                "name": agent_name,
+                "state": state,
+                "meta": {
+                    "agentId": agent_id,
+                    "active": is_active,
+                    "activeWindowMs": active_window_ms,
+                    "toolTtlMs": tool_ttl_ms,
+                    "maxUpdatedAt": max_updated_at,
+                    "sessionKeyForStatus": session_key_for_status,
+                    "statusSessionKey": status_session_key,
+                    "historySessionKey": history_session_key,
+                    "queueDepth": queue_depth,
+                    "statusText": status_text,
+                    "historyTypes": history_types,
+                    "historyLastRole": last_msg_role,
+                    "historyLastType": last_part_type,
+                    "sessionCount": agent_session_count,
+                },
+            }
             if _debug_enabled():
-                print(json.dumps({"kind": "lobster_room", "gatewayId": gw.get("id"), "error": msg}))
-        except Exception as e:
-            out["ok"] = False
-            msg = f"{gw['id']} error: {e}"
-            out["errors"].append(msg)
+                agent_payload["debug"] = dbg
+            result["agents"].append(agent_payload)
+
+        if over_budget:
+            msg = f"{gwid} poll budget exceeded"
+            result["errors"].append(msg)
             if _debug_enabled():
-                print(json.dumps({"kind": "lobster_room", "gatewayId": gw.get("id"), "error": msg}))
+                print(json.dumps({"kind": "lobster_room", "gatewayId": gwid, "error": msg}))
+
+    except urllib.error.HTTPError as e:
+        msg = f"{gwid} HTTP {e.code} at {url}"
+        result["errors"].append(msg)
+        if _debug_enabled():
+            print(json.dumps({"kind": "lobster_room", "gatewayId": gwid, "error": msg}))
+    except Exception as e:
+        msg = f"{gwid} error: {e}"
+        result["errors"].append(msg)
+        if _debug_enabled():
+            print(json.dumps({"kind": "lobster_room", "gatewayId": gwid, "error": msg}))
+
+    return result
+
+
+def build_lobster_room_state():
+    agg_cfg, active_window_ms, tool_ttl_ms, cache_ttl_ms, poll_seconds, poll_budget_ms = _aggregator_settings()
+    gateways = agg_cfg.get("gateways", [])
+
+    # Cache hit: return last successful payload to avoid UI flapping. Keyed on the gateways
+    # object, which _aggregator_settings() hands back unchanged until the config changes.
+    now_ms = int(time.time() * 1000)
+    with _cache_lock:
+        if _cache_last_ok and _cache_last_ok_gateways is gateways and (now_ms - _cache_last_ok_ms) <= cache_ttl_ms:
+            cached = dict(_cache_last_ok)
+            cached["cached"] = True
+            cached["cacheAgeMs"] = now_ms - _cache_last_ok_ms
+            return cached
+
+    # Single-flight: requests that miss the cache together share one aggregation instead
+    # of each fanning out to every gateway.
+    generation = _build_generation
+    with _build_lock:
+        if _build_generation != generation:
+            # Another request finished an aggregation while we waited for the lock.
+            return _last_build
+        now_ms = int(time.time() * 1000)
+        out = _aggregate_lobster_room_state(gateways, now_ms, active_window_ms, tool_ttl_ms, poll_seconds, poll_budget_ms)
+        globals()["_last_build"] = out
+        globals()["_build_generation"] = generation + 1
+        return out
+
+
+def _aggregate_lobster_room_state(gateways, now_ms, active_window_ms, tool_ttl_ms, poll_seconds, poll_budget_ms):
+    out = {
+        "ok": True,
+        "generatedAt": int(time.time()),
+        "pollSeconds": poll_seconds,
+        "gateways": [],
+        "agents": [],
+        "errors": [],
+    }
+
+    if not gateways:
+        out["ok"] = False
+        out["errors"].append("No gateways configured. Set LOBSTER_ROOM_GATEWAYS_JSON")
+        return out
+
+    # Gateways are independent network round-trips: poll them concurrently and merge the
+    # results back in configured order.
+    results = list(_gateway_pool.map(lambda gw: _poll_gateway(gw, now_ms, active_window_ms, tool_ttl_ms, poll_budget_ms), gateways))
+    for result in results:
+        if result["errors"]:
+            out["ok"] = False
+        out["gateways"].extend(result["gateways"])
+        out["agents"].extend(result["agents"])
+        out["errors"].extend(result["errors"])
 
     # If we got at least one agent, treat as good and update cache.
     if out.get("ok") and out.get("agents"):
         with _cache_lock:
             globals()["_cache_last_ok"] = out
             globals()["_cache_last_ok_ms"] = now_ms
+            globals()["_cache_last_ok_gateways"] = gateways
         out["cached"] = False
         out["cacheAgeMs"] = 0
         return out
 
     # If current fetch failed but we have last-known-good, return cached to prevent UI disappearing.
+    # A payload built from a different gateway config doesn't count: it would show stale gateways.
     with _cache_lock:
-        if _cache_last_ok:
+        if _cache_last_ok and _cache_last_ok_gateways is gateways:
             cached = dict(_cache_last_ok)
             cached["cached"] = True
             cached["cacheAgeMs"] = now_ms - _cache_last_ok_ms
@@ -598,44 +984,341 @@ def build_lobster_room_state():
     return out
 
 
+# Poller interval when the settings can't be read (e.g. a non-numeric pollSeconds).
+_POLL_FALLBACK_SECONDS = 2
+
+
+def _poll_loop():
+    """Refresh the served snapshot every pollSeconds, independent of HTTP traffic."""
+    while True:
+        poll_seconds = _POLL_FALLBACK_SECONDS
+        try:
+            state = build_lobster_room_state()
+            globals()["_latest_state"] = state
+            globals()["_latest_state_monotonic"] = time.monotonic()
+            poll_seconds = _aggregator_settings()[4]
+        except Exception as e:
+            if _debug_enabled():
+                print(json.dumps({"kind": "lobster_room", "error": f"background poll failed: {e}"}))
+        time.sleep(poll_seconds)
+
+
+def start_background_poller():
+    thread = threading.Thread(target=_poll_loop, name="lobster-room-poller", daemon=True)
+    thread.start()
+    return thread
+
+
+def current_lobster_room_state():
+    """Return the poller's latest snapshot, or build one inline if there isn't one yet."""
+    state, taken_at = _latest_state, _latest_state_monotonic
+    if state is None:
+        return build_lobster_room_state()
+    state = dict(state)
+    state["snapshotAgeMs"] = int((time.monotonic() - taken_at) * 1000)
+    return state
+
+
+class LobsterRoomHTTPServer(http.server.ThreadingHTTPServer):
+    """ThreadingHTTPServer that hands connections to a fixed pool of worker threads.
+
+    A burst of dashboard tabs queues for a free worker instead of spawning a thread
+    per connection. A worker only holds a connection while a request is being served:
+    idle keep-alive connections (e.g. a tab between polls) are parked in a selector and
+    handed back to the pool when the next request arrives.
+    """
+
+    # Room for bursts of dashboard polls; socketserver's default listen backlog is 5.
+    request_queue_size = 128
+    # SO_REUSEPORT (where the platform has it) so several server processes can share the port.
+    allow_reuse_port = True
+    # Close parked keep-alive connections that stay idle this long (seconds).
+    keepalive_idle_timeout = 30
+
+    def __init__(self, server_address, handler_class, workers=16):
+        self._workers = concurrent.futures.ThreadPoolExecutor(max_workers=workers, thread_name_prefix="lobster-room-http")
+        self._idle_selector = selectors.DefaultSelector()
+        self._idle_lock = threading.Lock()
+        self._idle_new = []  # (request, client_address) waiting to be registered by the watcher
+        self._idle_wake_r, self._idle_wake_w = socket.socketpair()
+        self._idle_wake_r.setblocking(False)
+        self._idle_wake_w.setblocking(False)
+        self._idle_selector.register(self._idle_wake_r, selectors.EVENT_READ)
+        self._closing = False
+        super().__init__(server_address, handler_class)
+        self._idle_watcher = threading.Thread(target=self._watch_idle_connections, name="lobster-room-keepalive", daemon=True)
+        self._idle_watcher.start()
+
+    def process_request(self, request, client_address):
+        self._submit_connection(request, client_address)
+
+    def _submit_connection(self, request, client_address):
+        future = self._workers.submit(self._process_connection, request, client_address)
+        future.add_done_callback(functools.partial(self._connection_done, request))
+
+    def _connection_done(self, request, future):
+        # Queued connections dropped by server_close() never reach a worker: close them here.
+        if future.cancelled():
+            self.shutdown_request(request)
+
+    def finish_request(self, request, client_address):
+        return self.RequestHandlerClass(request, client_address, self)
+
+    def _process_connection(self, request, client_address):
+        # process_request_thread(), except that a connection left idle but open is parked
+        # rather than closed.
+        try:
+            handler = self.finish_request(request, client_address)
+        except Exception:
+            self.handle_error(request, client_address)
+        else:
+            if getattr(handler, "idle", False):
+                self._park_connection(request, client_address)
+                return
+        self.shutdown_request(request)
+
+    def _park_connection(self, request, client_address):
+        with self._idle_lock:
+            closing = self._closing
+            if not closing:
+                self._idle_new.append((request, client_address))
+        if closing:
+            self.shutdown_request(request)
+        else:
+            self._wake_idle_watcher()
+
+    def _wake_idle_watcher(self):
+        try:
+            self._idle_wake_w.send(b"\0")
+        except (BlockingIOError, OSError):
+            pass  # a wake-up is already pending (or we're shutting down)
+
+    def _watch_idle_connections(self):
+        parked = {}  # request -> idle deadline (monotonic)
+        while not self._closing:
+            for key, _ in self._idle_selector.select(timeout=1.0):
+                request = key.fileobj
+                if request is self._idle_wake_r:
+                    try:
+                        while request.recv(4096):
+                            pass
+                    except (BlockingIOError, OSError):
+                        pass
+                    continue
+                # The client sent its next request (or hung up): serve it from the pool.
+                self._idle_selector.unregister(request)
+                del parked[request]
+                try:
+                    self._submit_connection(request, key.data)
+                except RuntimeError:  # pool shut down
+                    self.shutdown_request(request)
+
+            with self._idle_lock:
+                new, self._idle_new = self._idle_new, []
+            now = time.monotonic()
+            for request, client_address in new:
+                try:
+                    self._idle_selector.register(request, selectors.EVENT_READ, client_address)
+                except (ValueError, OSError):  # already closed by the client
+                    self.shutdown_request(request)
+                    continue
+                parked[request] = now + self.keepalive_idle_timeout
+            for request, deadline in list(parked.items()):
+                if deadline <= now:
+                    self._idle_selector.unregister(request)
+                    del parked[request]
+                    self.shutdown_request(request)
+
+        with self._idle_lock:
+            new, self._idle_new = self._idle_new, []
+        for request in [*parked, *(request for request, _ in new)]:
+            self.shutdown_request(request)
+        self._idle_selector.close()
+
+    def server_close(self):
+        super().server_close()
+        with self._idle_lock:
+            self._closing = True
+        self._wake_idle_watcher()
+        self._workers.shutdown(wait=False, cancel_futures=True)
+        self._idle_watcher.join()
+        self._idle_wake_r.close()
+        self._idle_wake_w.close()
+
+
 class Handler(http.server.SimpleHTTPRequestHandler):
+    # Keep-alive, so a page load's assets and the UI's polls reuse one connection. Every
+    # response must therefore carry Content-Length (or have no body, like 304).
+    protocol_version = "HTTP/1.1"
+    # Give up on a client that stalls mid-request for this long (seconds). Idle keep-alive
+    # connections don't count: LobsterRoomHTTPServer parks them off the worker pool.
+    timeout = 5
+    # Set by handle() when the connection stays open with no request pending yet.
+    idle = False
+    # Responses are small JSON/health bodies: send them without Nagle delays.
+    disable_nagle_algorithm = True
+
+    # Pre-encoded header blocks, queued the same way send_header() would queue them.
+    _NO_STORE_HEADERS = b"Cache-Control: no-cache, no-store, must-revalidate\r\nPragma: no-cache\r\nExpires: 0\r\n"
+    _JSON_HEADERS = b"Content-Type: application/json\r\nCache-Control: no-cache\r\n"
+    _GZIP_HEADERS = b"Content-Encoding: gzip\r\nVary: Accept-Encoding\r\n"
+    # JSON bodies below this aren't worth compressing.
+    _GZIP_MIN_BYTES = 1024
+    # /healthz response around its Date header, written in one go (probes don't need Server).
+    _HEALTHZ_HEAD = (
+        b"HTTP/1.1 200 OK\r\n"
+        b"Content-Type: text/plain; charset=utf-8\r\n"
+        b"Cache-Control: no-cache\r\n"
+        b"Content-Length: 2\r\n"
+    )
+    _HEALTHZ_TAIL = b"\r\nok"
+
     def __init__(self, *args, **kwargs):
         super().__init__(*args, directory=DIR, **kwargs)
 
+    def handle(self):
+        # Serve whatever the client has already sent, then hand the connection back to the
+        # server (see LobsterRoomHTTPServer) instead of blocking a worker on the next read.
+        self.close_connection = True
+        self.handle_one_request()
+        while not self.close_connection:
+            try:
+                pending = self._request_pending()
+            except OSError:
+                return
+            if not pending:
+                self.idle = True
+                return
+            self.handle_one_request()
+
+    def _request_pending(self):
+        """True if (part of) another request is already buffered or readable; never blocks."""
+        self.connection.settimeout(0)
+        try:
+            return bool(self.rfile.peek(1))
+        finally:
+            self.connection.settimeout(self.timeout)
+
     def end_headers(self):
+        etag = getattr(self, "_etag", None)
+        if etag:
+            self.send_header("ETag", etag)
+            self._etag = None
         if hasattr(self, "path") and (
             self.path.endswith(".html") or self.path == "/" or self.path.endswith(".js")
         ):
-            self.send_header("Cache-Control", "no-cache, no-store, must-revalidate")
-            self.send_header("Pragma", "no-cache")
-            self.send_header("Expires", "0")
+            self._send_raw_headers(self._NO_STORE_HEADERS)
         super().end_headers()
 
+    def send_head(self):
+        # Static assets (room images, maps, furniture) get a validator from mtime+size so a
+        # revalidating browser gets a bodiless 304 instead of the whole file again.
+        try:
+            st = os.stat(self.translate_path(self.path))
+        except OSError:
+            st = None
+        if st is not None and stat.S_ISREG(st.st_mode):
+            self._etag = f'"{st.st_mtime_ns:x}-{st.st_size:x}"'
+            if_none_match = self.headers.get("If-None-Match")
+            if if_none_match and self._etag_matches(if_none_match, self._etag):
+                self.send_response(304)
+                self.end_headers()
+                return None
+        return super().send_head()
+
+    @staticmethod
+    def _etag_matches(if_none_match, etag):
+        # Weak comparison, as RFC 9110 requires for If-None-Match.
+        for candidate in if_none_match.split(","):
+            candidate = candidate.strip()
+            if candidate == "*" or candidate.removeprefix("W/") == etag:
+                return True
+        return False
+
+    def copyfile(self, source, outputfile):
+        # Static files go straight from the page cache to the socket (os.sendfile); sources
+        # without a real file descriptor keep the buffered copy.
+        if outputfile is self.wfile:
+            try:
+                source.fileno()
+            except (AttributeError, OSError):
+                pass
+            else:
+                self.wfile.flush()
+                self.connection.sendfile(source)
+                return
+        super().copyfile(source, outputfile)
+
+    def _send_raw_headers(self, raw):
+        if not hasattr(self, "_headers_buffer"):
+            self._headers_buffer = []
+        self._headers_buffer.append(raw)
+
     def _send_json(self, code, payload):
+        body = _json_dumps(payload)
         self.send_response(code)
-        self.send_header("Content-Type", "application/json")
-        self.send_header("Cache-Control", "no-cache")
+        self._send_raw_headers(self._JSON_HEADERS)
+        if len(body) > self._GZIP_MIN_BYTES and self._accepts_gzip(self.headers.get("Accept-Encoding", "")):
+            # Agent payloads are repetitive JSON; a fast gzip level shrinks them several-fold.
+            body = gzip.compress(body, compresslevel=3)
+            self._send_raw_headers(self._GZIP_HEADERS)
+        self._send_raw_headers(b"Content-Length: %d\r\n" % len(body))
         self.end_headers()
-        self.wfile.write(json.dumps(payload).encode("utf-8"))
+        self.wfile.write(body)
+
+    def _get_healthz(self):
+        self.log_request(200, 2)
+        # RFC 9110 section 6.6.1: an origin server with a clock must send Date.
+        date = self.date_time_string().encode("latin-1")
+        self.wfile.write(b"%sDate: %s\r\n%s" % (self._HEALTHZ_HEAD, date, self._HEALTHZ_TAIL))
+
+    def _get_lobster_room(self):
+        self._send_json(200, current_lobster_room_state())
+
+    # Dynamic GET endpoints by path (query string ignored); anything else is a static file.
+    _GET_ROUTES = {
+        "/healthz": _get_healthz,
+        "/healthz/": _get_healthz,
+        "/api/lobster-room": _get_lobster_room,
+    }
+    # Paths that serve the room page itself.
+    _PAGE_ALIASES = frozenset(("", "/", "/lobster-room", "/lobster-room/"))
+
+    @staticmethod
+    def _accepts_gzip(accept_encoding):
+        # RFC 9110 Accept-Encoding: an explicit "gzip" (or its alias "x-gzip") entry beats "*",
+        # and q=0 means refused.
+        gzip_q = any_q = None
+        for coding in accept_encoding.split(","):
+            name, _, params = coding.partition(";")
+            name = name.strip().lower()
+            if name == "x-gzip":
+                name = "gzip"
+            if name not in ("gzip", "*"):
+                continue
+            q = 1.0
+            for param in params.split(";"):
+                key, _, value = param.partition("=")
+                if key.strip().lower() == "q":
+                    try:
+                        q = float(value)
+                    except ValueError:
+                        q = 0.0
+            if name == "gzip":
+                gzip_q = q
+            else:
+                any_q = q
+        q = gzip_q if gzip_q is not None else any_q
+        return bool(q and q > 0)
 
     def do_GET(self):
-        if self.path in ("/healthz", "/healthz/"):
-            self.send_response(200)
-            self.send_header("Content-Type", "text/plain; charset=utf-8")
-            self.send_header("Cache-Control", "no-cache")
-            self.end_headers()
-            self.wfile.write(b"ok")
+        route = self.path.partition("?")[0]
+        handler = self._GET_ROUTES.get(route)
+        if handler is not None:
+            handler(self)
             return
-
-        if self.path in ("/", ""):
-            self.path = "/lobster-room.html"
-        elif self.path in ("/lobster-room", "/lobster-room/"):
+        if route in self._PAGE_ALIASES:
             self.path = "/lobster-room.html"
-
-        if self.path == "/api/lobster-room" or self.path.startswith("/api/lobster-room?"):
-            self._send_json(200, build_lobster_room_state())
-            return
-
         super().do_GET()
 
 
@@ -655,8 +1338,10 @@ def main():
     parser.add_argument("--port", "-p", type=int, default=port)
     args = parser.parse_args()
 
-    httpd = http.server.HTTPServer((args.bind, args.port), Handler)
-    httpd.socket.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    # Threaded so a slow gateway aggregation doesn't stall /healthz or static assets.
+    workers = _server_workers_from_env_or_cfg(server_cfg)
+    httpd = LobsterRoomHTTPServer((args.bind, args.port), Handler, workers=workers)
+    start_background_poller()
     print(f"[lobster-room] Serving on http://{args.bind}:{args.port}/")
     httpd.serve_forever()
 
@@ -0,0 +1,48 @@
+"""Accept-Encoding parsing for gzipped JSON responses.
+
+An explicit q=0 is a refusal, not an acceptance; codings are matched by name, with
+x-gzip treated as gzip (RFC 9110 section 8.4.1.3). Run: python3 tests/server-accept-encoding-gzip-regression.py
+"""
+
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+import server  # noqa: E402
+
+CASES = [
+    ("", False),
+    ("identity", False),
+    ("deflate, br", False),
+    ("gzip", True),
+    ("gzip, deflate, br", True),
+    ("gzip;q=0.5", True),
+    ("GZIP;Q=0.5", True),
+    ("gzip;q=0", False),
+    ("GZIP;q=0.0", False),
+    ("gzip; q=0.000, br", False),
+    ("gzip;q=abc", False),
+    ("*", True),
+    ("*;q=0", False),
+    ("identity, *;q=0.1", True),
+    ("gzip;q=0, *", False),
+    ("*, gzip;q=0", False),
+    ("x-gzip", True),
+    ("x-gzip;q=0", False),
+    ("gzipx", False),
+]
+
+
+def main():
+    failures = [
+        f"{header!r}: expected {expected}, got {got}"
+        for header, expected in CASES
+        if (got := server.Handler._accepts_gzip(header)) != expected
+    ]
+    assert not failures, "\n".join(failures)
+    print(f"ok: {len(CASES)} Accept-Encoding cases")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+"""server_close() must release every socket LobsterRoomHTTPServer opened or accepted.
+
+Opens and closes a few servers, each with one worker held by a stalled request, one
+connection queued behind it and one idle keep-alive connection parked. Afterwards the
+process must be back to its starting file descriptors, and no accepted socket may have
+been left for the garbage collector to close. Run: python3 tests/server-close-releases-sockets-regression.py
+"""
+
+import gc
+import http.client
+import os
+import socket
+import sys
+import threading
+import time
+import warnings
+
+os.environ["LOBSTER_ROOM_GATEWAYS_JSON"] = "[]"
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+import server  # noqa: E402
+
+ROUNDS = 3
+
+
+def open_fds():
+    return len(os.listdir("/proc/self/fd"))
+
+
+def closed_cleanly(sock):
+    # shutdown_request() sends FIN; a socket dropped on the floor is reset instead.
+    sock.settimeout(2)
+    try:
+        return sock.recv(1024) == b""
+    except ConnectionResetError:
+        return False
+
+
+def one_round():
+    httpd = server.LobsterRoomHTTPServer(("127.0.0.1", 0), server.Handler, workers=1)
+    httpd.RequestHandlerClass.log_message = lambda *args: None
+    serving = threading.Thread(target=httpd.serve_forever)
+    serving.start()
+    address = httpd.server_address
+
+    # Park an idle keep-alive connection, then pin the only worker with a half-sent request.
+    idle = http.client.HTTPConnection(*address, timeout=3)
+    idle.request("GET", "/healthz")
+    idle.getresponse().read()
+    stalled = socket.create_connection(address)
+    stalled.sendall(b"GET /healthz HTTP/1.1\r\n")
+    time.sleep(0.2)
+    queued = socket.create_connection(address)
+    queued.sendall(b"GET /healthz HTTP/1.1\r\nHost: x\r\n\r\n")
+    time.sleep(0.2)
+
+    httpd.shutdown()
+    serving.join()
+    httpd.server_close()
+
+    assert closed_cleanly(queued), "queued connection was not closed by server_close()"
+    assert closed_cleanly(idle.sock), "parked keep-alive connection was not closed by server_close()"
+    # Let the pinned worker see EOF and finish its connection.
+    stalled.close()
+    time.sleep(0.3)
+    queued.close()
+    idle.close()
+
+
+def main():
+    before = open_fds()
+    with warnings.catch_warnings(record=True) as caught:
+        warnings.simplefilter("always", ResourceWarning)
+        for _ in range(ROUNDS):
+            one_round()
+        gc.collect()
+    after = open_fds()
+
+    unclosed = [str(w.message) for w in caught if issubclass(w.category, ResourceWarning)]
+    assert not unclosed, f"sockets left for the garbage collector: {unclosed}"
+    assert after == before, f"{after - before} file descriptors leaked over {ROUNDS} servers"
+    print(f"ok: {ROUNDS} servers closed with no leaked sockets")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,45 @@
+"""/healthz must carry a Date header like every other response (RFC 9110 section 6.6.1).
+
+Requests /healthz twice over one keep-alive connection and checks the Date header is
+present and current, and that the pre-encoded response is still framed correctly.
+Run: python3 tests/server-healthz-date-regression.py
+"""
+
+import email.utils
+import http.client
+import os
+import sys
+import threading
+import time
+
+os.environ["LOBSTER_ROOM_GATEWAYS_JSON"] = "[]"
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+import server  # noqa: E402
+
+
+def main():
+    httpd = server.LobsterRoomHTTPServer(("127.0.0.1", 0), server.Handler, workers=2)
+    httpd.RequestHandlerClass.log_message = lambda *args: None
+    threading.Thread(target=httpd.serve_forever, daemon=True).start()
+
+    conn = http.client.HTTPConnection(*httpd.server_address, timeout=3)
+    for _ in range(2):
+        conn.request("GET", "/healthz")
+        resp = conn.getresponse()
+        body = resp.read()
+        assert resp.status == 200 and body == b"ok", (resp.status, body)
+        assert resp.headers["Content-Type"] == "text/plain; charset=utf-8", resp.headers
+        date = resp.headers["Date"]
+        assert date, f"/healthz has no Date header: {dict(resp.headers)}"
+        skew = abs(email.utils.parsedate_to_datetime(date).timestamp() - time.time())
+        assert skew < 5, f"Date {date!r} is {skew:.0f}s off"
+        assert not resp.will_close, "/healthz closed the keep-alive connection"
+    conn.close()
+    httpd.shutdown()
+    httpd.server_close()
+    print(f"ok: /healthz sent Date: {date}")
+
+
+if __name__ == "__main__":
+    main()
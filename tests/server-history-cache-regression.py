@@ -0,0 +1,84 @@
+"""The sessions_history shape cache must never serve a failed fetch or outlive toolTtlMs.
+
+One idle session on a fake gateway whose updatedAt never moves. A failed sessions_history
+result must be fetched again on the next poll, a good one is reused, and once toolTtlMs
+has passed the history is fetched again even though updatedAt is unchanged.
+Run: python3 tests/server-history-cache-regression.py
+"""
+
+import http.server
+import json
+import os
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+TOOL_TTL_MS = 1000
+OLD_MS = int(time.time() * 1000) - 3600_000
+GATEWAY = {"fail": False, "last_type": "text", "history_calls": 0}
+
+
+class FakeGateway(http.server.BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, *args):
+        pass
+
+    def do_POST(self):
+        tool = json.loads(self.rfile.read(int(self.headers["Content-Length"])))["tool"]
+        if tool == "sessions_list":
+            sessions = [{"key": "agent:main:main", "kind": "direct", "updatedAt": OLD_MS}]
+            out = {"ok": True, "result": {"details": {"count": 1, "sessions": sessions}}}
+        elif tool == "session_status":
+            out = {"ok": True, "result": {"details": {"queueDepth": 0}}}
+        else:
+            GATEWAY["history_calls"] += 1
+            if GATEWAY["fail"]:
+                out = {"ok": False}
+            else:
+                message = {"role": "assistant", "content": [{"type": GATEWAY["last_type"]}]}
+                out = {"ok": True, "result": {"details": {"messages": [message]}}}
+        body = json.dumps(out).encode()
+        self.send_response(200)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+def main():
+    gateway = http.server.ThreadingHTTPServer(("127.0.0.1", 0), FakeGateway)
+    threading.Thread(target=gateway.serve_forever, daemon=True).start()
+    os.environ["LOBSTER_ROOM_GATEWAYS_JSON"] = json.dumps(
+        [{"id": "g", "label": "G", "baseUrl": f"http://127.0.0.1:{gateway.server_address[1]}"}]
+    )
+    os.environ["LOBSTER_ROOM_CACHE_TTL_MS"] = "0"
+    os.environ["LOBSTER_ROOM_TOOL_TTL_MS"] = str(TOOL_TTL_MS)
+
+    import server
+
+    def poll():
+        agent = server.build_lobster_room_state()["agents"][0]
+        return GATEWAY["history_calls"], agent["meta"]["historyLastType"]
+
+    GATEWAY["fail"] = True
+    assert poll() == (1, None)
+    assert poll() == (2, None), "a failed sessions_history result was cached"
+
+    GATEWAY["fail"] = False
+    assert poll() == (3, "text")
+    assert poll() == (3, "text"), "an idle session's history was not reused"
+
+    GATEWAY["last_type"] = "toolCall"
+    time.sleep(TOOL_TTL_MS / 1000 + 0.2)
+    calls, last_type = poll()
+    gateway.shutdown()
+
+    assert calls == 4, f"history was not re-fetched after toolTtlMs ({calls} calls)"
+    assert last_type == "toolCall", last_type
+    print("ok: failed fetches are not cached and cached shapes expire after toolTtlMs")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+"""Keep-alive connections between polls must not hold server.py's worker threads.
+
+Runs N+1 dashboard-style pollers (one keep-alive connection each, polling
+/api/lobster-room) against a server with N workers, and checks that a fresh
+/healthz probe is still answered promptly. Run: python3 tests/server-keepalive-worker-pool-regression.py
+"""
+
+import http.client
+import os
+import sys
+import threading
+import time
+
+os.environ["LOBSTER_ROOM_GATEWAYS_JSON"] = "[]"
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+import server  # noqa: E402
+
+WORKERS = 2
+POLLERS = WORKERS + 1
+POLL_INTERVAL_S = 0.5
+POLL_ROUNDS = 6
+
+
+def main():
+    httpd = server.LobsterRoomHTTPServer(("127.0.0.1", 0), server.Handler, workers=WORKERS)
+    httpd.RequestHandlerClass.log_message = lambda *args: None
+    threading.Thread(target=httpd.serve_forever, daemon=True).start()
+    port = httpd.server_address[1]
+
+    failures = []
+    started = threading.Barrier(POLLERS + 1)
+
+    def poll():
+        conn = http.client.HTTPConnection("127.0.0.1", port, timeout=5)
+        sock = None
+        try:
+            for i in range(POLL_ROUNDS):
+                conn.request("GET", "/api/lobster-room")
+                resp = conn.getresponse()
+                resp.read()
+                if resp.status != 200:
+                    failures.append(f"poll status {resp.status}")
+                if sock is None:
+                    sock = conn.sock
+                elif conn.sock is not sock:
+                    failures.append("poller connection was not kept alive")
+                if i == 0:
+                    started.wait()
+                time.sleep(POLL_INTERVAL_S)
+        except Exception as e:
+            failures.append(f"poller error: {e!r}")
+        finally:
+            conn.close()
+
+    pollers = [threading.Thread(target=poll) for _ in range(POLLERS)]
+    for t in pollers:
+        t.start()
+    started.wait()
+
+    # Every worker would be pinned by now if idle keep-alive connections held one.
+    t0 = time.monotonic()
+    probe = http.client.HTTPConnection("127.0.0.1", port, timeout=3)
+    probe.request("GET", "/healthz")
+    resp = probe.getresponse()
+    body = resp.read()
+    elapsed = time.monotonic() - t0
+    probe.close()
+
+    for t in pollers:
+        t.join()
+    httpd.shutdown()
+    httpd.server_close()
+
+    assert resp.status == 200 and body == b"ok", (resp.status, body)
+    assert elapsed < 1.0, f"/healthz took {elapsed:.2f}s with {POLLERS} keep-alive pollers on {WORKERS} workers"
+    assert not failures, failures
+    print(f"ok: /healthz answered in {elapsed * 1000:.0f}ms with {POLLERS} keep-alive pollers on {WORKERS} workers")
+
+
+if __name__ == "__main__":
+    main()
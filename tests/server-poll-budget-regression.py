@@ -0,0 +1,74 @@
+"""A gateway poll must stop at pollBudgetMs and report it, not run every agent's calls.
+
+Ten idle agents on a fake gateway whose sessions_history is slow, with pollBudgetMs=1000
+set through the LOBSTER_ROOM_GATEWAYS_JSON object form. The poll has to come back
+shortly after the budget with a "poll budget exceeded" error for that gateway.
+Run: python3 tests/server-poll-budget-regression.py
+"""
+
+import http.server
+import json
+import os
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+AGENTS = 10
+HISTORY_DELAY_S = 0.8
+BUDGET_MS = 1000
+OLD_MS = int(time.time() * 1000) - 3600_000
+
+
+class FakeGateway(http.server.BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, *args):
+        pass
+
+    def do_POST(self):
+        tool = json.loads(self.rfile.read(int(self.headers["Content-Length"])))["tool"]
+        if tool == "sessions_list":
+            sessions = [{"key": f"agent:a{i}:main", "kind": "direct", "updatedAt": OLD_MS} for i in range(AGENTS)]
+            out = {"ok": True, "result": {"details": {"count": len(sessions), "sessions": sessions}}}
+        elif tool == "session_status":
+            out = {"ok": True, "result": {"details": {"queueDepth": 0}}}
+        else:
+            time.sleep(HISTORY_DELAY_S)
+            out = {"ok": True, "result": {"details": {"messages": []}}}
+        body = json.dumps(out).encode()
+        self.send_response(200)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+def main():
+    gateway = http.server.ThreadingHTTPServer(("127.0.0.1", 0), FakeGateway)
+    threading.Thread(target=gateway.serve_forever, daemon=True).start()
+    os.environ["LOBSTER_ROOM_GATEWAYS_JSON"] = json.dumps(
+        {
+            "gateways": [{"id": "g", "label": "G", "baseUrl": f"http://127.0.0.1:{gateway.server_address[1]}"}],
+            "pollBudgetMs": BUDGET_MS,
+        }
+    )
+    os.environ["LOBSTER_ROOM_CACHE_TTL_MS"] = "0"
+
+    import server
+
+    assert server._aggregator_settings()[5] == BUDGET_MS, "pollBudgetMs from the gateways object was ignored"
+    t0 = time.monotonic()
+    out = server.build_lobster_room_state()
+    elapsed = time.monotonic() - t0
+    gateway.shutdown()
+
+    assert "g poll budget exceeded" in out["errors"], out["errors"]
+    assert out["ok"] is False, out["ok"]
+    # Budget plus at most one in-flight round of calls (floored at 0.5s each).
+    assert elapsed < BUDGET_MS / 1000 + 1.0, f"poll took {elapsed:.2f}s with a {BUDGET_MS}ms budget"
+    print(f"ok: poll stopped after {elapsed:.2f}s with {len(out['agents'])}/{AGENTS} agents and a budget error")
+
+
+if __name__ == "__main__":
+    main()
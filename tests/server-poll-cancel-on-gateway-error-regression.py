@@ -0,0 +1,74 @@
+"""A failed session_status call must not leave that agent's queued calls running.
+
+The fake gateway answers session_status with HTTP 500. With a one-worker invoke pool
+the agent's sessions_history calls are still queued when the gateway poll aborts; none
+of them may reach the gateway afterwards.
+Run: python3 tests/server-poll-cancel-on-gateway-error-regression.py
+"""
+
+import concurrent.futures
+import http.server
+import json
+import os
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+CALLS = []  # (monotonic time, tool)
+OLD_MS = int(time.time() * 1000) - 3600_000
+
+
+class FakeGateway(http.server.BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, *args):
+        pass
+
+    def do_POST(self):
+        tool = json.loads(self.rfile.read(int(self.headers["Content-Length"])))["tool"]
+        CALLS.append((time.monotonic(), tool))
+        code, out = 200, {}
+        if tool == "sessions_list":
+            sessions = [{"key": f"agent:main:s{i}", "kind": "direct", "updatedAt": OLD_MS - i} for i in range(6)]
+            out = {"ok": True, "result": {"details": {"count": len(sessions), "sessions": sessions}}}
+        elif tool == "session_status":
+            time.sleep(0.05)
+            code = 500
+        else:
+            time.sleep(0.3)
+            out = {"ok": True, "result": {"details": {"messages": []}}}
+        body = json.dumps(out).encode()
+        self.send_response(code)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+def main():
+    gateway = http.server.ThreadingHTTPServer(("127.0.0.1", 0), FakeGateway)
+    threading.Thread(target=gateway.serve_forever, daemon=True).start()
+    os.environ["LOBSTER_ROOM_GATEWAYS_JSON"] = json.dumps(
+        [{"id": "g", "label": "G", "baseUrl": f"http://127.0.0.1:{gateway.server_address[1]}"}]
+    )
+    os.environ["LOBSTER_ROOM_CACHE_TTL_MS"] = "0"
+
+    import server
+
+    server._invoke_pool = concurrent.futures.ThreadPoolExecutor(max_workers=1)
+    out = server.build_lobster_room_state()
+    returned_at = time.monotonic()
+    time.sleep(1.0)
+    gateway.shutdown()
+
+    # The worker may pick up the next status call before the poll cancels; that one is
+    # already running. The history calls queued behind it must never be sent.
+    late = [tool for at, tool in CALLS if at > returned_at and tool == "sessions_history"]
+    assert out["errors"] and "HTTP 500" in out["errors"][0], out["errors"]
+    assert not late, f"calls reached the gateway after the poll gave up: {late}"
+    print("ok: queued calls were cancelled when session_status failed")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,38 @@
+"""The background poller must survive settings it can't parse.
+
+With "pollSeconds": "abc" in LOBSTER_ROOM_GATEWAYS_JSON, reading the settings raises.
+The poller thread has to keep running on its fallback interval and pick the snapshot
+back up once the config is fixed.
+Run: python3 tests/server-poller-bad-poll-seconds-regression.py
+"""
+
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+os.environ["LOBSTER_ROOM_GATEWAYS_JSON"] = json.dumps({"gateways": [], "pollSeconds": "abc"})
+
+import server  # noqa: E402
+
+
+def main():
+    server._POLL_FALLBACK_SECONDS = 0.05
+    thread = server.start_background_poller()
+    time.sleep(0.3)
+    assert thread.is_alive(), "poller thread died on a bad pollSeconds"
+    assert server._latest_state is None
+
+    os.environ["LOBSTER_ROOM_GATEWAYS_JSON"] = json.dumps({"gateways": [], "pollSeconds": 1})
+    deadline = time.monotonic() + 2
+    while server._latest_state is None and time.monotonic() < deadline:
+        time.sleep(0.05)
+    assert thread.is_alive(), "poller thread died"
+    assert server._latest_state is not None, "poller never recovered after the config was fixed"
+    print("ok: poller survived a bad pollSeconds and recovered")
+
+
+if __name__ == "__main__":
+    main()